@@ -6,20 +6,20 @@ QR e PDF417 attraverso le librerie python-barcode, qrcode e pdf417gen.
 """
 from __future__ import annotations
 
-import json
 import sys
-from dataclasses import asdict, dataclass
-from io import BytesIO
-from typing import Dict, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 try:  # pragma: no cover - librerie opzionali in fase di runtime
     import barcode
     from barcode.writer import ImageWriter
+    import orjson
     import pdf417gen
     import qrcode
-    from PIL import Image
+    from PIL import Image, ImageOps
     from pyzbar.pyzbar import decode as decode_barcode
 except ImportError as exc:  # pragma: no cover
     missing = str(exc).split("(")[0].strip()
@@ -27,6 +27,106 @@ except ImportError as exc:  # pragma: no cover
         f"Dipendenza mancante ({missing}). Assicurati di aver installato le librerie richieste."
     ) from exc
 
+try:  # pragma: no cover - encoder QR opzionale, molto più rapido di qrcode
+    import segno
+except ImportError:  # pragma: no cover
+    segno = None
+
+# Mappa i moduli della matrice segno (0x1 scuro, 0x0 chiaro) in pixel a 8 bit.
+_QR_MODULE_TABLE = bytes([0xFF]) + bytes(255)
+_QR_BOX_SIZE = 10
+_QR_BORDER = 2
+# Maschera fissa: evita la valutazione delle 8 maschere, irrilevante per lo scanner.
+_QR_MASK_PATTERN = 0
+
+
+def _render_qr_segno(payload: str) -> Image.Image:
+    """Genera il QR con segno costruendo l'immagine direttamente dalla matrice."""
+
+    qr = segno.make_qr(payload, error="m", mask=_QR_MASK_PATTERN, boost_error=False)
+    size = len(qr.matrix)
+    pixels = b"".join(bytes(row).translate(_QR_MODULE_TABLE) for row in qr.matrix)
+    modules = Image.frombytes("L", (size, size), pixels)
+    full_size = size + 2 * _QR_BORDER
+    canvas = Image.new("L", (full_size, full_size), 0xFF)
+    canvas.paste(modules, (_QR_BORDER, _QR_BORDER))
+    scaled = canvas.resize((full_size * _QR_BOX_SIZE, full_size * _QR_BOX_SIZE), Image.NEAREST)
+    return scaled.convert("RGB")
+
+
+# Converte le cifre binarie dei codeword PDF417 in pixel a 8 bit (1 nero, 0 bianco).
+_PDF417_MODULE_TABLE = str.maketrans({"0": "\xff", "1": "\x00"})
+_PDF417_SCALE = 2
+_PDF417_RATIO = 3
+_PDF417_PADDING = 20
+
+
+def _render_pdf417(codes: List[List[int]]) -> Image.Image:
+    """Equivalente di ``pdf417gen.render_image`` che costruisce l'intera matrice in un colpo."""
+
+    rows = ["".join(format(value, "b") for value in row) for row in codes]
+    width, height = len(rows[0]), len(rows)
+    pixels = "".join(rows).translate(_PDF417_MODULE_TABLE).encode("latin-1")
+    modules = Image.frombytes("L", (width, height), pixels)
+    scaled = modules.resize(
+        (width * _PDF417_SCALE, height * _PDF417_SCALE * _PDF417_RATIO), Image.NEAREST
+    )
+    return ImageOps.expand(scaled, _PDF417_PADDING, 0xFF).convert("RGB")
+
+
+_DECODE_MAX_SIZE = 1024
+
+
+def _decode_image(image: Image.Image) -> list:
+    """Decodifica passando a zbar direttamente il piano di luminanza a 8 bit.
+
+    Le immagini grandi vengono prima ridotte; se la versione ridotta non
+    contiene barcode leggibili si ripete la decodifica a piena risoluzione.
+    """
+
+    gray = image.convert("L")
+    if max(gray.size) > _DECODE_MAX_SIZE:
+        reduced = ImageOps.contain(gray, (_DECODE_MAX_SIZE, _DECODE_MAX_SIZE), Image.LANCZOS)
+        decoded = decode_barcode((reduced.tobytes(), reduced.width, reduced.height))
+        if decoded:
+            return decoded
+    return decode_barcode((gray.tobytes(), gray.width, gray.height))
+
+
+# Istanze riutilizzate tra una generazione e l'altra per evitarne il setup.
+_CODE128_WRITER = ImageWriter()
+_QR_ENCODER = qrcode.QRCode(
+    version=None,
+    box_size=_QR_BOX_SIZE,
+    border=_QR_BORDER,
+    mask_pattern=_QR_MASK_PATTERN,
+)
+
+
+@lru_cache(maxsize=32)
+def _encode_barcode(barcode_type: str, payload: str) -> Image.Image:
+    """Genera il barcode richiesto, riutilizzando i risultati già calcolati."""
+
+    if barcode_type == "Code128":
+        code = barcode.get("code128", payload, writer=_CODE128_WRITER)
+        # render() restituisce direttamente l'immagine PIL, senza passare dal PNG.
+        image = code.render({"module_height": 15.0, "text_distance": 1.0})
+        return image.convert("RGB")
+    if barcode_type == "QR":
+        if segno is not None:
+            return _render_qr_segno(payload)
+        qr = _QR_ENCODER
+        qr.clear()
+        # clear() non azzera la versione: senza reset il fit partirebbe dall'ultima usata.
+        qr.version = None
+        qr.add_data(payload)
+        qr.make(fit=True)
+        return qr.make_image(fill_color="black", back_color="white").convert("RGB")
+    if barcode_type == "PDF417":
+        codes = pdf417gen.encode(payload, columns=6, security_level=2)
+        return _render_pdf417(codes)
+    raise ValueError(f"Formato barcode non supportato: {barcode_type}")
+
 
 @dataclass
 class ProductData:
@@ -38,13 +138,14 @@ class ProductData:
     notes: str
 
     def to_payload(self) -> str:
-        return json.dumps(asdict(self), ensure_ascii=False)
+        # orjson serializza le dataclass nativamente, senza la copia di asdict().
+        return orjson.dumps(self).decode("utf-8")
 
     @classmethod
     def from_payload(cls, payload: str) -> "ProductData":
         try:
-            data = json.loads(payload)
-        except json.JSONDecodeError:
+            data = orjson.loads(payload)
+        except orjson.JSONDecodeError:
             parts = [segment.split(":", 1) for segment in payload.split(";") if ":" in segment]
             data = {key.strip(): value.strip() for key, value in parts}
         return cls(
@@ -149,32 +250,13 @@ class BarcodeWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.critical(self, "Errore generazione", str(exc))
             return
         self.generated_image = image
-        pixmap = self.pil_to_pixmap(image)
-        self.preview_label.setPixmap(pixmap.scaled(
-            self.preview_label.size(),
-            QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-            QtCore.Qt.TransformationMode.SmoothTransformation,
-        ))
+        self.preview_label.setPixmap(self.pil_to_pixmap(self.fit_to_preview(image)))
         self.show_status("Barcode generato con successo", 3000)
 
     def create_barcode_image(self, payload: str) -> Image.Image:
         barcode_type = self.barcode_type_combo.currentText()
-        if barcode_type == "Code128":
-            code = barcode.get("code128", payload, writer=ImageWriter())
-            buffer = BytesIO()
-            code.write(buffer, options={"module_height": 15.0, "text_distance": 1.0})
-            buffer.seek(0)
-            return Image.open(buffer).convert("RGB")
-        if barcode_type == "QR":
-            qr = qrcode.QRCode(version=None, box_size=10, border=2)
-            qr.add_data(payload)
-            qr.make(fit=True)
-            return qr.make_image(fill_color="black", back_color="white").convert("RGB")
-        if barcode_type == "PDF417":
-            codes = pdf417gen.encode(payload, columns=6, security_level=2)
-            img = pdf417gen.render_image(codes, scale=2)
-            return img.convert("RGB")
-        raise ValueError(f"Formato barcode non supportato: {barcode_type}")
+        # Copia: l'immagine in cache non deve essere modificata dai chiamanti.
+        return _encode_barcode(barcode_type, payload).copy()
 
     # ------------------------------------------------------------------
     # File handling
@@ -189,7 +271,8 @@ class BarcodeWindow(QtWidgets.QMainWindow):
         if not filename:
             return
         try:
-            self.generated_image.save(filename, format="PNG")
+            # Le ampie zone uniformi del barcode comprimono bene anche al livello 1.
+            self.generated_image.save(filename, format="PNG", compress_level=1, optimize=False)
         except Exception as exc:
             QtWidgets.QMessageBox.critical(self, "Errore salvataggio", str(exc))
             return
@@ -207,7 +290,7 @@ class BarcodeWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.critical(self, "Errore apertura", str(exc))
             return
 
-        decoded = decode_barcode(image)
+        decoded = _decode_image(image)
         if not decoded:
             QtWidgets.QMessageBox.warning(self, "Decodifica fallita", "Nessun barcode riconosciuto.")
             return
@@ -215,26 +298,45 @@ class BarcodeWindow(QtWidgets.QMainWindow):
         data = ProductData.from_payload(payload)
         self.apply_data(data)
         self.generated_image = image.convert("RGB")
-        pixmap = self.pil_to_pixmap(self.generated_image)
-        self.preview_label.setPixmap(pixmap.scaled(
-            self.preview_label.size(),
-            QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-            QtCore.Qt.TransformationMode.SmoothTransformation,
-        ))
+        # Qt legge direttamente il file: evita di ricodificare l'immagine PIL.
+        pixmap = QtGui.QPixmap(filename)
+        if pixmap.isNull():
+            pixmap = self.pil_to_pixmap(self.fit_to_preview(self.generated_image))
+        else:
+            pixmap = pixmap.scaled(
+                self.preview_label.size(),
+                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation,
+            )
+        self.preview_label.setPixmap(pixmap)
         self.show_status("Barcode importato e decodificato", 3000)
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
+    def fit_to_preview(self, image: Image.Image) -> Image.Image:
+        """Ridimensiona con Pillow alle dimensioni dell'anteprima, mantenendo le proporzioni."""
+
+        target = self.preview_label.size()
+        width, height = image.size
+        ratio = min(target.width() / width, target.height() / height)
+        size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+        if size == image.size:
+            return image
+        return image.resize(size, Image.BILINEAR)
+
     def pil_to_pixmap(self, image: Image.Image) -> QtGui.QPixmap:
-        buffer = BytesIO()
-        image.save(buffer, format="PNG")
-        qt_image = QtGui.QImage()
-        qt_image.loadFromData(buffer.getvalue())
+        rgb = image.convert("RGB")
+        width, height = rgb.size
+        data = rgb.tobytes("raw", "RGB")
+        # copy() svincola la QImage dal buffer Python, che verrà liberato.
+        qt_image = QtGui.QImage(
+            data, width, height, 3 * width, QtGui.QImage.Format.Format_RGB888
+        ).copy()
         return QtGui.QPixmap.fromImage(qt_image)
 
     def show_status(self, message: str, timeout: int = 0) -> None:
-        self.statusBar().showMessage(message, timeout)
+        self.status_bar.showMessage(message, timeout)
 
 
 def main() -> None:
@@ -1,10 +1,13 @@
 """Interfaccia minimale per la gestione delle smart card."""
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence
 
 from PyQt5 import QtCore, QtWidgets
 
@@ -25,10 +28,10 @@ except ImportError:  # pragma: no cover - allow the GUI to start without pyscard
         clean = value.replace(" ", "")
         if len(clean) % 2:
             raise ValueError("Hex string must contain an even number of characters")
-        return [int(clean[i : i + 2], 16) for i in range(0, len(clean), 2)]
+        return list(bytes.fromhex(clean))
 
     def toHexString(data: Sequence[int]) -> str:
-        return " ".join(f"{byte:02X}" for byte in data)
+        return bytes(data).hex(" ").upper()
 
 
 LOG_FILE = Path(__file__).with_name("logs.txt")
@@ -36,10 +39,15 @@ LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 logger = logging.getLogger("smartcard_manager")
 if not logger.handlers:
+    # La scrittura su file avviene in un thread dedicato per non rallentare gli APDU.
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
     handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    log_listener = QueueListener(log_queue, handler)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
     logger.setLevel(logging.INFO)
     logger.propagate = False
 
@@ -54,13 +62,15 @@ class SmartCardBackend(QtCore.QObject):
         super().__init__()
         self.connection = None
         self.connected_reader = None
+        self._reader_map: Dict[str, object] = {}
 
     def available_readers(self) -> List[str]:
         if readers is None:
             logger.warning("pyscard non disponibile: impossibile elencare i lettori")
             return []
         try:
-            reader_list = [str(reader) for reader in readers()]
+            self._reader_map = {str(reader): reader for reader in readers()}
+            reader_list = list(self._reader_map)
             logger.info("Lettori trovati: %s", reader_list)
             return reader_list
         except Exception as exc:  # pragma: no cover - runtime safeguard
@@ -70,24 +80,27 @@ class SmartCardBackend(QtCore.QObject):
     def connect(self, reader_name: str) -> Optional[str]:
         if readers is None:
             raise RuntimeError("pyscard non disponibile")
-        for reader in readers():
-            if str(reader) == reader_name:
-                connection = reader.createConnection()
-                try:
-                    connection.connect()
-                except Exception as exc:
-                    logger.exception("Connessione al lettore %s fallita", reader_name)
-                    raise
-                self.connection = connection
-                self.connected_reader = reader
-                atr = getattr(connection, "getATR", lambda: None)()
-                if atr:
-                    atr_text = toHexString(atr)
-                    logger.info("ATR letto: %s", atr_text)
-                    return atr_text
-                logger.info("ATR non disponibile per il lettore %s", reader_name)
-                return None
-        raise RuntimeError("lettore non trovato")
+        reader = self._reader_map.get(reader_name)
+        if reader is None:
+            self._reader_map = {str(item): item for item in readers()}
+            reader = self._reader_map.get(reader_name)
+        if reader is None:
+            raise RuntimeError("lettore non trovato")
+        connection = reader.createConnection()
+        try:
+            connection.connect()
+        except Exception as exc:
+            logger.exception("Connessione al lettore %s fallita", reader_name)
+            raise
+        self.connection = connection
+        self.connected_reader = reader
+        atr = getattr(connection, "getATR", lambda: None)()
+        if atr:
+            atr_text = toHexString(atr)
+            logger.info("ATR letto: %s", atr_text)
+            return atr_text
+        logger.info("ATR non disponibile per il lettore %s", reader_name)
+        return None
 
     def disconnect(self) -> None:
         if self.connection:
@@ -103,7 +116,8 @@ class SmartCardBackend(QtCore.QObject):
         if not self.connection:
             raise RuntimeError("nessuna connessione attiva")
         apdu_bytes = toBytes(apdu_hex)
-        logger.info("APDU inviata: %s", toHexString(apdu_bytes))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("APDU inviata: %s", toHexString(apdu_bytes))
         try:
             response = self.connection.transmit(apdu_bytes)
         except NoCardException as exc:
@@ -113,44 +127,162 @@ class SmartCardBackend(QtCore.QObject):
             logger.exception("Errore di connessione durante la trasmissione APDU")
             raise
         data, sw1, sw2 = response
-        logger.info("Risposta APDU: dati=%s SW=%02X %02X", toHexString(data), sw1, sw2)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Risposta APDU: dati=%s SW=%02X %02X", toHexString(data), sw1, sw2)
         return response
 
     def read_card_dump(self, length: int = 256, block_size: int = 16) -> List[List[int]]:
         if not self.connection:
             raise RuntimeError("nessuna connessione attiva")
+        logger.info("Inizio lettura dump di %d byte", length)
+        data = self._read_extended(length)
+        if data is None:
+            dump = self._read_blocks(length, block_size)
+        else:
+            dump = [data[i : i + block_size] for i in range(0, len(data), block_size)]
+        logger.info("Lettura dump completata: %d blocchi", len(dump))
+        return dump
+
+    def write_card_dump(self, dump: Sequence[Sequence[int]]) -> None:
+        if not self.connection:
+            raise RuntimeError("nessuna connessione attiva")
+        data = [byte for block in dump for byte in block]
+        logger.info("Inizio scrittura dump di %d byte", len(data))
+        if not (data and self._write_extended(data)):
+            self._write_blocks(dump)
+        logger.info("Scrittura dump completata")
+
+    def _read_extended(self, length: int) -> Optional[List[int]]:
+        """Legge l'intero dump con una sola READ BINARY a Le esteso."""
+
+        apdu = [0x00, 0xB0, 0x00, 0x00, 0x00, (length >> 8) & 0xFF, length & 0xFF]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Lettura estesa di %d byte con APDU %s", length, toHexString(apdu))
+        response = self._transmit_extended(apdu)
+        if response is None:
+            return None
+        data, sw1, sw2 = response
+        expected = length
+        if sw1 == 0x6C:
+            # Le=00 in forma corta indica 256 byte.
+            expected = sw2 or 256
+            if expected < length:
+                logger.info(
+                    "La card indica solo %d di %d byte, lettura a blocchi", expected, length
+                )
+                return None
+            apdu = [0x00, 0xB0, 0x00, 0x00, sw2]
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Lunghezza indicata dalla card, nuova APDU %s", toHexString(apdu))
+            response = self._transmit_extended(apdu)
+            if response is None:
+                return None
+            data, sw1, sw2 = response
+        if (sw1, sw2) != (0x90, 0x00):
+            logger.info(
+                "Lettura estesa non supportata (status %02X %02X), lettura a blocchi", sw1, sw2
+            )
+            return None
+        if len(data) != expected:
+            logger.info(
+                "Lettura estesa incompleta (%d di %d byte), lettura a blocchi", len(data), expected
+            )
+            return None
+        data = data[:length]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dump letto: %s", toHexString(data))
+        return list(data)
+
+    def _write_extended(self, data: Sequence[int]) -> bool:
+        """Scrive l'intero dump con una sola UPDATE BINARY a Lc esteso."""
+
+        length = len(data)
+        apdu = [0x00, 0xD0, 0x00, 0x00, 0x00, (length >> 8) & 0xFF, length & 0xFF, *data]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Scrittura estesa di %d byte, intestazione %s", length, toHexString(apdu[:7]))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("APDU scrittura estesa: %s", toHexString(apdu))
+        response = self._transmit_extended(apdu)
+        if response is None:
+            return False
+        data, sw1, sw2 = response
+        if (sw1, sw2) != (0x90, 0x00):
+            logger.info(
+                "Scrittura estesa non supportata (status %02X %02X), scrittura a blocchi", sw1, sw2
+            )
+            return False
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dump scritto, risposta %s", toHexString(data))
+        return True
+
+    def _transmit_extended(self, apdu: List[int]) -> Optional[Sequence[int]]:
+        try:
+            return self.connection.transmit(apdu)
+        except NoCardException:
+            raise
+        except CardConnectionException:
+            logger.info("APDU estese non supportate dal lettore", exc_info=True)
+            return None
+
+    def _read_blocks(self, length: int, block_size: int) -> List[List[int]]:
         dump: List[List[int]] = []
         for offset in range(0, length, block_size):
             apdu = [0x00, 0xB0, (offset >> 8) & 0xFF, offset & 0xFF, block_size]
-            logger.info("Lettura blocco offset %04X con APDU %s", offset, toHexString(apdu))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Lettura blocco offset %04X con APDU %s", offset, toHexString(apdu))
             data, sw1, sw2 = self.connection.transmit(apdu)
             if (sw1, sw2) != (0x90, 0x00):
                 logger.error(
                     "Errore lettura offset %04X: status %02X %02X", offset, sw1, sw2
                 )
                 raise RuntimeError("lettura fallita")
-            logger.info("Blocco %04X letto: %s", offset, toHexString(data))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Blocco %04X letto: %s", offset, toHexString(data))
             dump.append(data)
         return dump
 
-    def write_card_dump(self, dump: Sequence[Sequence[int]]) -> None:
-        if not self.connection:
-            raise RuntimeError("nessuna connessione attiva")
+    def _write_blocks(self, dump: Sequence[Sequence[int]]) -> None:
         offset = 0
         for block in dump:
             length = len(block)
             apdu = [0x00, 0xD0, (offset >> 8) & 0xFF, offset & 0xFF, length, *block]
-            logger.info("Scrittura blocco %04X con APDU %s", offset, toHexString(apdu))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Scrittura blocco %04X con APDU %s", offset, toHexString(apdu))
             data, sw1, sw2 = self.connection.transmit(apdu)
             if (sw1, sw2) != (0x90, 0x00):
                 logger.error(
                     "Errore scrittura offset %04X: status %02X %02X", offset, sw1, sw2
                 )
                 raise RuntimeError("scrittura fallita")
-            logger.info("Blocco %04X scritto, risposta %s", offset, toHexString(data))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Blocco %04X scritto, risposta %s", offset, toHexString(data))
             offset += length
 
 
+class _WorkerSignals(QtCore.QObject):
+    """Segnali emessi da :class:`DumpWorker` verso il thread della GUI."""
+
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(Exception)
+
+
+class DumpWorker(QtCore.QRunnable):
+    """Esegue un'operazione bloccante sulla card nel pool di thread di Qt."""
+
+    def __init__(self, task: Callable[[], object]) -> None:
+        super().__init__()
+        self.task = task
+        self.signals = _WorkerSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.task()
+        except Exception as exc:
+            self.signals.failed.emit(exc)
+            return
+        self.signals.finished.emit(result)
+
+
 class VirtualCardDialog(QtWidgets.QDialog):
     """Finestra di supporto per l'emulazione software."""
 
@@ -189,8 +321,9 @@ class VirtualCardDialog(QtWidgets.QDialog):
             return "Selezione file riuscita (SW=9000)\n"
         if cla == 0x00 and ins == 0xB0:
             length = apdu[4] if len(apdu) > 4 else 0
-            data = [((p1 << 8) + p2 + i) & 0xFF for i in range(length)]
-            return f"Dati emulati: {toHexString(data)} (SW=9000)\n"
+            start = (p1 << 8) + p2
+            data = bytes((start + i) & 0xFF for i in range(length))
+            return f"Dati emulati: {data.hex(' ').upper()} (SW=9000)\n"
         return "Comando non riconosciuto (SW=6D00)\n"
 
 
@@ -200,6 +333,7 @@ class SmartCardWindow(QtWidgets.QMainWindow):
     def __init__(self) -> None:
         super().__init__()
         self.backend = SmartCardBackend()
+        self._worker: Optional[DumpWorker] = None
 
         self.setWindowTitle("Gestione Smart Card")
         self.setMinimumSize(500, 400)
@@ -250,20 +384,11 @@ class SmartCardWindow(QtWidgets.QMainWindow):
         if not reader_name:
             self._show_error("Errore: nessun lettore trovato")
             return
-        try:
-            atr = self.backend.connect(reader_name)
-            if atr is None:
-                logger.info("ATR non disponibile, proseguo con la lettura")
-            self.backend.read_card_dump()
-            self._show_success("Operazione completata con successo")
-        except NoCardException:
-            logger.exception("Lettura fallita: nessuna card presente")
-            self._show_error("Errore: nessuna card trovata")
-        except Exception:
-            logger.exception("Errore generico durante la lettura")
-            self._show_warning("Operazione fallita, riprovare")
-        finally:
-            self.backend.disconnect()
+        self._start_worker(
+            lambda: self._connect_and_read(reader_name),
+            self._on_dump_finished,
+            self._on_read_failed,
+        )
 
     def handle_clone(self) -> None:
         logger.info("Richiesta operazione di clonazione")
@@ -271,32 +396,90 @@ class SmartCardWindow(QtWidgets.QMainWindow):
         if not reader_name:
             self._show_error("Errore: nessun lettore trovato")
             return
+        QtWidgets.QMessageBox.information(
+            self,
+            "Clona Card",
+            "Inserisci la card da copiare e premi OK per continuare.",
+        )
+        self._start_worker(
+            lambda: self._connect_and_read(reader_name),
+            lambda dump: self._on_clone_dump_read(reader_name, dump),
+            self._on_clone_failed,
+        )
+
+    def _on_clone_dump_read(self, reader_name: str, dump: List[List[int]]) -> None:
+        QtWidgets.QMessageBox.information(
+            self,
+            "Clona Card",
+            "Inserisci la card vuota e premi OK per completare la clonazione.",
+        )
+        self._start_worker(
+            lambda: self._connect_and_write(reader_name, dump),
+            self._on_dump_finished,
+            self._on_clone_failed,
+        )
+
+    def _connect_and_read(self, reader_name: str) -> List[List[int]]:
+        # Connessione e disconnessione avvengono nello stesso thread del worker.
         try:
-            QtWidgets.QMessageBox.information(
-                self,
-                "Clona Card",
-                "Inserisci la card da copiare e premi OK per continuare.",
-            )
-            self.backend.connect(reader_name)
-            dump = self.backend.read_card_dump()
+            atr = self.backend.connect(reader_name)
+            if atr is None:
+                logger.info("ATR non disponibile, proseguo con la lettura")
+            return self.backend.read_card_dump()
+        finally:
             self.backend.disconnect()
-            QtWidgets.QMessageBox.information(
-                self,
-                "Clona Card",
-                "Inserisci la card vuota e premi OK per completare la clonazione.",
-            )
+
+    def _connect_and_write(self, reader_name: str, dump: List[List[int]]) -> None:
+        try:
             self.backend.connect(reader_name)
             self.backend.write_card_dump(dump)
-            self._show_success("Operazione completata con successo")
-        except NoCardException:
-            logger.exception("Clonazione fallita: nessuna card presente")
-            self._show_error("Errore: nessuna card trovata")
-        except Exception:
-            logger.exception("Errore durante la clonazione")
-            self._show_warning("Operazione fallita, riprovare")
         finally:
             self.backend.disconnect()
 
+    def _start_worker(
+        self,
+        task: Callable[[], object],
+        on_finished: Callable[[object], None],
+        on_failed: Callable[[Exception], None],
+    ) -> None:
+        self._set_busy(True)
+        worker = DumpWorker(task)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.failed.connect(on_failed)
+        # Mantiene vivi i segnali finché il risultato non è stato consegnato.
+        self._worker = worker
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_dump_finished(self, _result: object) -> None:
+        self._finish_operation()
+        self._show_success("Operazione completata con successo")
+
+    def _on_read_failed(self, exc: Exception) -> None:
+        self._finish_operation()
+        if isinstance(exc, NoCardException):
+            logger.error("Lettura fallita: nessuna card presente", exc_info=exc)
+            self._show_error("Errore: nessuna card trovata")
+        else:
+            logger.error("Errore generico durante la lettura", exc_info=exc)
+            self._show_warning("Operazione fallita, riprovare")
+
+    def _on_clone_failed(self, exc: Exception) -> None:
+        self._finish_operation()
+        if isinstance(exc, NoCardException):
+            logger.error("Clonazione fallita: nessuna card presente", exc_info=exc)
+            self._show_error("Errore: nessuna card trovata")
+        else:
+            logger.error("Errore durante la clonazione", exc_info=exc)
+            self._show_warning("Operazione fallita, riprovare")
+
+    def _finish_operation(self) -> None:
+        self._worker = None
+        self._set_busy(False)
+
+    def _set_busy(self, busy: bool) -> None:
+        for button in (self.read_button, self.clone_button, self.emulate_button):
+            button.setEnabled(not busy)
+
     def handle_emulate(self) -> None:
         logger.info("Richiesta operazione di emulazione")
         dialog = VirtualCardDialog(self)